@@ -6,6 +6,7 @@ import os
 from dotenv import load_dotenv
 from config import get_settings
 from routers import upload, chat
+from services.rag_agent import rag_agent
 
 load_dotenv("../.env")
 settings = get_settings()
@@ -15,7 +16,14 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     print("M.A.R.S Agentic RAG System starting...")
     os.environ["GOOGLE_API_KEY"] = settings.google_api_key
+    upload.embed_batcher.start()
+    try:
+        rag_agent.initialize("gemini")
+    except ValueError as e:
+        print(f"Gemini init deferred: {e}")
     yield
+    await upload.embed_batcher.stop()
+    await rag_agent.aclose()
     print("M.A.R.S shutting down...")
 
 
@@ -1,8 +1,11 @@
 """Chat Router - RAG agent interactions."""
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from services.rag_agent import rag_agent
+from routers.etag import StaticJSON
 from routers.upload import sessions
 
 router = APIRouter()
@@ -41,16 +44,35 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the answer over SSE so the first tokens arrive immediately."""
+    async def event_stream():
+        async for event in rag_agent.chat_stream(
+            query=request.message,
+            session_id=request.session_id,
+            history=request.history,
+            provider=request.model
+        ):
+            yield f"data: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+_models_json = StaticJSON({
+    "models": [
+        {"id": "gemini", "name": "Gemini 3 Flash", "type": "online", "provider": "Google"},
+        {"id": "ollama", "name": "Llama 3.2:3B", "type": "local", "provider": "Ollama"}
+    ],
+    "default": "gemini"
+})
+
+
 @router.get("/models")
-async def get_models():
+async def get_models(request: Request):
     """Get available models."""
-    return {
-        "models": [
-            {"id": "gemini", "name": "Gemini 3 Flash", "type": "online", "provider": "Google"},
-            {"id": "ollama", "name": "Llama 3.2:3B", "type": "local", "provider": "Ollama"}
-        ],
-        "default": "gemini"
-    }
+    return _models_json.response(request)
 
 
 @router.get("/chat/history/{session_id}")
@@ -0,0 +1,35 @@
+"""Static JSON responses with ETag support for endpoints that never change."""
+import gzip
+import hashlib
+import json
+from fastapi import Request, Response
+
+
+class StaticJSON:
+    """Precomputed JSON body plus a stable ETag and gzip variant.
+
+    Lets polling clients short-circuit with 304 Not Modified instead of
+    re-downloading the same payload. Compression is done once here rather
+    than via app-wide gzip middleware, which would also compress SSE
+    responses and buffer individual events inside zlib.
+    """
+
+    _GZIP_MIN_SIZE = 500
+
+    def __init__(self, payload, max_age: int = 300):
+        self.body = json.dumps(payload).encode()
+        self.etag = hashlib.blake2s(self.body).hexdigest()[:16]
+        # mtime=0 keeps the compressed bytes deterministic across restarts
+        self.gzipped = (gzip.compress(self.body, mtime=0)
+                        if len(self.body) >= self._GZIP_MIN_SIZE else None)
+        self._cache_control = f"public, max-age={max_age}"
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": self._cache_control}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        if self.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
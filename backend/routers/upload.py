@@ -1,15 +1,125 @@
 """Upload Router - File processing for RAG."""
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from fastapi.responses import JSONResponse
 from typing import List
+import anyio
+import anyio.to_thread
+import asyncio
+import os
+import tempfile
 import uuid
 import logging
 from services.file_processor import file_processor
 from services.vector_store import vector_store
+from services.session_store import session_pool
+from routers.etag import StaticJSON
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-sessions: dict[str, dict] = {}
+sessions = session_pool
+
+# Caps concurrent extractions at the core count so parallel uploads don't
+# oversubscribe the CPU; the extractors themselves are mostly C libraries
+# that release the GIL, so worker threads genuinely run in parallel
+_extract_limiter = anyio.CapacityLimiter(os.cpu_count() or 4)
+
+
+class _EmbedBatcher:
+    """Coalesce near-simultaneous uploads into one vector-store call.
+
+    Items queue up and are flushed once 20 ms have passed or 256 chunks are
+    pending, whichever comes first, so concurrent uploads to the same session
+    share a single embedding request.
+    """
+    MAX_WAIT = 0.02
+    MAX_CHUNKS = 256
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def add(self, chunks: list[dict], session_id: str) -> int:
+        if self._task is None:
+            # Batcher not running (e.g. tests) - add directly
+            return await vector_store.add_documents(chunks, session_id)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((chunks, session_id, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            pending = len(batch[0][0])
+            deadline = loop.time() + self.MAX_WAIT
+            while pending < self.MAX_CHUNKS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                pending += len(item[0])
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        by_session: dict[str, list] = {}
+        for chunks, session_id, future in batch:
+            by_session.setdefault(session_id, []).append((chunks, future))
+
+        for session_id, items in by_session.items():
+            merged = [chunk for chunks, _ in items for chunk in chunks]
+            try:
+                await vector_store.add_documents(merged, session_id)
+                for chunks, future in items:
+                    if not future.done():
+                        future.set_result(len(chunks))
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+embed_batcher = _EmbedBatcher()
+
+
+def _cpu_work(path: str, filename: str) -> list[dict]:
+    """Extract and chunk one file. Runs in a worker thread."""
+    text = file_processor.extract_text_from_path(path, filename)
+    if not text or not text.strip():
+        return []
+    return file_processor.chunk_text(text, filename)
+
+
+async def _process_one(file: UploadFile) -> list[dict]:
+    # Stream to a temp file in 1 MiB chunks so large uploads never sit
+    # fully in memory; workers get the path, not the bytes
+    with tempfile.NamedTemporaryFile(delete=False) as spool:
+        while chunk := await file.read(1 << 20):
+            spool.write(chunk)
+        path = spool.name
+    try:
+        return await anyio.to_thread.run_sync(
+            _cpu_work, path, file.filename, limiter=_extract_limiter
+        )
+    finally:
+        os.unlink(path)
 
 
 @router.post("/upload")
@@ -18,39 +128,50 @@ async def upload_files(files: List[UploadFile] = File(...), session_id: str = No
         session_id = str(uuid.uuid4())
     if session_id not in sessions:
         sessions[session_id] = {"files": [], "total_chunks": 0}
-    
+
     processed_files, total_chunks, errors = [], 0, []
-    
+
+    valid_files = []
     for file in files:
+        ext = file.filename.split(".")[-1].lower()
+        if ext not in file_processor.SUPPORTED_EXTENSIONS:
+            errors.append({"filename": file.filename, "error": f"Unsupported: {ext}"})
+        else:
+            valid_files.append(file)
+
+    # Read and process all files concurrently; extraction runs off the event loop
+    outcomes = await asyncio.gather(
+        *(_process_one(f) for f in valid_files), return_exceptions=True
+    )
+
+    all_chunks, extracted = [], []
+    for file, outcome in zip(valid_files, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Error processing {file.filename}: {outcome}")
+            errors.append({"filename": file.filename, "error": str(outcome) or repr(outcome)})
+        elif not outcome:
+            errors.append({"filename": file.filename, "error": "No text extracted"})
+        else:
+            all_chunks.extend(outcome)
+            extracted.append((file.filename, len(outcome)))
+
+    # One batched add amortizes embedding API overhead across files, and the
+    # batcher coalesces chunks from concurrent uploads. Files count as
+    # processed - and session metadata is updated - only once their chunks
+    # have actually reached the vector store
+    if all_chunks:
         try:
-            ext = file.filename.split(".")[-1].lower()
-            if ext not in file_processor.SUPPORTED_EXTENSIONS:
-                errors.append({"filename": file.filename, "error": f"Unsupported: {ext}"})
-                continue
-            
-            content = await file.read()
-            text = file_processor.extract_text(content, file.filename)
-            
-            if not text or not text.strip():
-                errors.append({"filename": file.filename, "error": "No text extracted"})
-                continue
-            
-            chunks = file_processor.chunk_text(text, file.filename)
-            if not chunks:
-                errors.append({"filename": file.filename, "error": "No chunks created"})
-                continue
-            
-            num_chunks = vector_store.add_documents(chunks, session_id)
-            processed_files.append({"filename": file.filename, "chunks": num_chunks})
-            total_chunks += num_chunks
-            sessions[session_id]["files"].append(file.filename)
-            sessions[session_id]["total_chunks"] += num_chunks
-            
+            total_chunks = await embed_batcher.add(all_chunks, session_id)
         except Exception as e:
-            import traceback
-            logger.error(f"Error processing {file.filename}: {e}\n{traceback.format_exc()}")
-            errors.append({"filename": file.filename, "error": str(e) or repr(e)})
-    
+            logger.error(f"Vector store add failed for session {session_id}: {e}")
+            for filename, _ in extracted:
+                errors.append({"filename": filename,
+                               "error": f"Embedding failed: {str(e) or repr(e)}"})
+        else:
+            processed_files = [{"filename": f, "chunks": n} for f, n in extracted]
+            sessions[session_id]["files"].extend(f for f, _ in extracted)
+            sessions[session_id]["total_chunks"] += total_chunks
+
     return JSONResponse({
         "session_id": session_id,
         "processed_files": processed_files,
@@ -74,6 +195,9 @@ async def clear_session(session_id: str):
     return {"message": "Session cleared", "session_id": session_id}
 
 
+_formats_json = StaticJSON({"extensions": sorted(list(file_processor.SUPPORTED_EXTENSIONS))})
+
+
 @router.get("/supported-formats")
-async def get_supported_formats():
-    return {"extensions": sorted(list(file_processor.SUPPORTED_EXTENSIONS))}
+async def get_supported_formats(request: Request):
+    return _formats_json.response(request)
@@ -1,2 +1,2 @@
 """Services module for the M.A.R.S RAG System."""
-from . import file_processor, vector_store, rag_agent
+from . import file_processor, vector_store, rag_agent, session_store
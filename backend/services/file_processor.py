@@ -4,31 +4,233 @@ Based on M.A.R.S original implementation by Sahil Bhoite.
 
 Supports 35+ file types including documents, code, audio, video, and images.
 """
+import hashlib
 import io
 import json
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
 from config import get_settings
 
 settings = get_settings()
 
+# Heavy parsing libraries are imported once at module load instead of on
+# every file; each is optional, so a missing package just routes to the
+# fallbacks below. The media stacks (moviepy, pydub, speech_recognition,
+# tesserocr, faster_whisper) stay lazy - their imports are slow and only
+# needed for audio/video/image uploads.
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+try:
+    from docx import Document as DocxDocument
+except ImportError:
+    DocxDocument = None
+try:
+    from pptx import Presentation
+except ImportError:
+    Presentation = None
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+try:
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa_csv = None
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+    etree = None
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+_LANG_NAMES = {
+    "py": "Python", "java": "Java", "c": "C", "h": "C Header",
+    "cpp": "C++", "js": "JavaScript", "ts": "TypeScript",
+    "swift": "Swift", "r": "R", "rs": "Rust", "sql": "SQL",
+    "css": "CSS", "txt": "Text",
+    "go": "Go", "kt": "Kotlin", "scala": "Scala",
+    "php": "PHP", "rb": "Ruby", "sh": "Shell", "bash": "Bash"
+}
+
+_CODE_EXTENSIONS = frozenset(_LANG_NAMES)
+
+# Content-addressed cache of extracted text: re-uploads and identical files
+# inside different ZIPs skip OCR/PDF/ASR work entirely
+CACHE_DIR = Path("/tmp/mars_cache")
+
+
+def _content_key(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _file_key(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    try:
+        return (CACHE_DIR / key).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _cacheable(text: str) -> bool:
+    """False for bracketed placeholders describing a transient failure or a
+    missing optional dependency - caching those would replay the failure
+    forever for that content, even after the cause is fixed."""
+    if not (text.startswith("[") and text.endswith("]")) or "\n" in text:
+        return True
+    lowered = text.lower()
+    markers = ("error:", "limited:", "not available", "requires", "install")
+    return not any(marker in lowered for marker in markers)
+
+
+def _cache_put(key: str, text: str) -> None:
+    if not _cacheable(text):
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / key).write_text(text, encoding="utf-8")
+    except OSError:
+        pass
+
+
+# Local Whisper model (CTranslate2, int8 on CPU) replaces the per-file call
+# to Google's online ASR endpoint; loaded lazily on first use
+_whisper_model = None
+_whisper_lock = threading.Lock()
+
+
+def _get_whisper_model():
+    global _whisper_model
+    from faster_whisper import WhisperModel
+    with _whisper_lock:
+        if _whisper_model is None:
+            _whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
+    return _whisper_model
+
+
+# In-process Tesseract API avoids a subprocess fork per image; the API object
+# is not reentrant, so calls are serialized behind a lock
+_tess_api = None
+_tess_lock = threading.Lock()
+
+
+def _ocr_image(gray) -> str:
+    global _tess_api
+    try:
+        import tesserocr
+        from PIL import Image
+    except ImportError:
+        import pytesseract
+        return pytesseract.image_to_string(gray)
+
+    with _tess_lock:
+        if _tess_api is None:
+            _tess_api = tesserocr.PyTessBaseAPI(lang="eng")
+        _tess_api.SetImage(Image.fromarray(gray))
+        return _tess_api.GetUTF8Text()
+
+
+# Tried from coarsest to finest; "" is the hard character-offset fallback
+_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def _split_on_boundaries(text: str, chunk_size: int, separators: list[str]) -> list[str]:
+    """Recursively split text into pieces no longer than chunk_size, preferring
+    paragraph, line, sentence and word boundaries in that order."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    separator = separators[0]
+    if separator == "":
+        return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+
+    parts = text.split(separator)
+    # Re-attach the separator so no characters are lost
+    parts = [part + separator for part in parts[:-1]] + [parts[-1]]
+
+    pieces = []
+    for part in parts:
+        if len(part) <= chunk_size:
+            pieces.append(part)
+        else:
+            pieces.extend(_split_on_boundaries(part, chunk_size, separators[1:]))
+    return pieces
+
+
+@lru_cache(maxsize=None)
+def _make_chunker(chunk_size: int, chunk_overlap: int):
+    """Build a chunker specialized for one (chunk_size, chunk_overlap) pair.
+
+    The pair comes from settings and never changes at runtime, so the
+    constants (and the overlap guard) are resolved once here instead of on
+    every call; lru_cache hands back the same closure thereafter.
+    """
+    carry = chunk_overlap if 0 < chunk_overlap < chunk_size else 0
+
+    def chunk(text: str) -> list[str]:
+        if not text:
+            return []
+
+        pieces = _split_on_boundaries(text, chunk_size, _SEPARATORS)
+
+        chunks = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) > chunk_size:
+                chunks.append(current)
+                # Trim the carried overlap so overlap + piece never
+                # exceeds chunk_size (pieces themselves are capped at
+                # chunk_size by the splitter)
+                keep = min(carry, chunk_size - len(piece))
+                current = current[-keep:] if keep > 0 else ""
+            current += piece
+        if current:
+            chunks.append(current)
+        return [c for c in chunks if c.strip()]
+
+    return chunk
+
 
 def simple_chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> list[str]:
-    """Simple text chunking without langchain dependency."""
-    if not text:
-        return []
-    
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - chunk_overlap
-        if start < 0:
-            start = 0
-    return chunks
+    """Boundary-aware text chunking without langchain dependency.
+
+    Splits on natural boundaries (paragraphs, lines, sentences, words) before
+    resorting to hard character offsets, then greedily merges pieces up to
+    chunk_size, carrying up to chunk_overlap characters into the next chunk
+    (trimmed when needed so no chunk ever exceeds chunk_size).
+    """
+    return _make_chunker(chunk_size, chunk_overlap)(text)
 
 
 class FileProcessor:
@@ -57,74 +259,79 @@ class FileProcessor:
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
     
+    def extract_text_from_path(self, path: str, filename: str) -> str:
+        """Extract text from a file already on disk, avoiding a full in-memory copy.
+
+        Media extractors work on the path directly (they need a file on disk
+        anyway); everything else reads the bytes and goes through extract_text.
+        """
+        extension = filename.split(".")[-1].lower()
+
+        try:
+            if extension in ["wav", "mp3", "mp4"]:
+                key = _file_key(path)
+                cached = _cache_get(key)
+                if cached is not None:
+                    return cached
+                if extension == "mp4":
+                    text = self._extract_video_from_path(path)
+                else:
+                    text = self._extract_audio_from_path(path, extension)
+                _cache_put(key, text)
+                return text
+
+            with open(path, "rb") as f:
+                return self.extract_text(f.read(), filename)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error processing {filename}: {str(e)}")
+
     def extract_text(self, file_content: bytes, filename: str) -> str:
-        """Extract text from a file based on its extension."""
+        """Extract text from a file based on its extension, caching by content hash."""
+        key = _content_key(file_content)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        text = self._extract_text_uncached(file_content, filename)
+        _cache_put(key, text)
+        return text
+
+    def _extract_text_uncached(self, file_content: bytes, filename: str) -> str:
         extension = filename.split(".")[-1].lower()
-        
+        handler = self._DISPATCH.get(extension)
+
         try:
-            # Documents
-            if extension == "pdf":
-                return self._extract_pdf(file_content)
-            elif extension == "docx":
-                return self._extract_docx(file_content)
-            elif extension == "doc":
-                return self._extract_doc_legacy(file_content)
-            elif extension == "pptx":
-                return self._extract_pptx(file_content)
-            elif extension == "ppt":
-                return self._extract_ppt_legacy(file_content)
-            elif extension in ["xlsx", "xls"]:
-                return self._extract_excel(file_content)
-            elif extension == "csv":
-                return self._extract_csv(file_content)
-            
-            # Code files - plain text (extended)
-            elif extension in ["py", "java", "c", "h", "cpp", "js", "ts", "swift", "r", "rs", "sql", 
-                             "css", "txt", "go", "kt", "scala", "php", "rb", "sh", "bash"]:
-                return self._extract_code(file_content, extension)
-            
-            # Markup
-            elif extension == "html":
-                return self._extract_html(file_content)
-            elif extension == "xml":
-                return self._extract_xml(file_content)
-            elif extension == "json":
-                return self._extract_json(file_content)
-            elif extension in ["md", "tex"]:
-                return self._extract_text_plain(file_content)
-            
-            # Images with OCR
-            elif extension in ["jpg", "jpeg", "png", "bmp"]:
-                return self._extract_image_ocr(file_content)
-            
-            # Archives
-            elif extension == "zip":
-                return self._extract_zip(file_content)
-            
-            # Audio (WAV and MP3)
-            elif extension in ["wav", "mp3"]:
-                return self._extract_audio(file_content, extension)
-            
-            # Video (MP4)
-            elif extension == "mp4":
-                return self._extract_video(file_content)
-            
-            else:
+            if handler is None:
                 raise ValueError(f"Unsupported file type: {extension}")
-                
+            if extension in self._TAKES_EXTENSION:
+                return handler(self, file_content, extension)
+            return handler(self, file_content)
         except Exception as e:
             raise ValueError(f"Error processing {filename}: {str(e)}")
     
     def _extract_pdf(self, content: bytes) -> str:
         """Extract text from PDF file."""
+        # MuPDF's C parser is an order of magnitude faster than PyPDF2 and
+        # extracts better text; PyPDF2 stays as a fallback
+        if pymupdf is not None:
+            try:
+                with pymupdf.open(stream=content, filetype="pdf") as doc:
+                    text = "\n".join(page.get_text() for page in doc)
+                if not text.strip():
+                    return "[PDF file - no extractable text found]"
+                return text.strip()
+            except Exception:
+                pass
+
         try:
-            from PyPDF2 import PdfReader
-            text = ""
+            parts = []
             pdf_reader = PdfReader(io.BytesIO(content))
             for page in pdf_reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
+                    parts.append(page_text)
+            text = "\n".join(parts)
             if not text.strip():
                 return "[PDF file - no extractable text found]"
             return text.strip()
@@ -134,16 +341,15 @@ class FileProcessor:
     def _extract_docx(self, content: bytes) -> str:
         """Extract text from Word document."""
         try:
-            from docx import Document
-            text = ""
-            doc = Document(io.BytesIO(content))
+            parts = []
+            doc = DocxDocument(io.BytesIO(content))
             for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+                parts.append(paragraph.text)
             # Also extract from tables
             for table in doc.tables:
                 for row in table.rows:
-                    row_text = " | ".join([cell.text for cell in row.cells])
-                    text += row_text + "\n"
+                    parts.append(" | ".join([cell.text for cell in row.cells]))
+            text = "\n".join(parts)
             return text.strip() if text.strip() else "[DOCX file - no text found]"
         except Exception as e:
             raise ValueError(f"DOCX processing error: {str(e)}")
@@ -151,14 +357,14 @@ class FileProcessor:
     def _extract_pptx(self, content: bytes) -> str:
         """Extract text from PowerPoint presentation."""
         try:
-            from pptx import Presentation
-            text = ""
+            parts = []
             prs = Presentation(io.BytesIO(content))
             for slide_num, slide in enumerate(prs.slides, 1):
-                text += f"\n--- Slide {slide_num} ---\n"
+                parts.append(f"\n--- Slide {slide_num} ---")
                 for shape in slide.shapes:
                     if hasattr(shape, "text") and shape.text:
-                        text += shape.text + "\n"
+                        parts.append(shape.text)
+            text = "\n".join(parts)
             return text.strip() if text.strip() else "[PPTX file - no text found]"
         except Exception as e:
             raise ValueError(f"PPTX processing error: {str(e)}")
@@ -225,28 +431,52 @@ class FileProcessor:
     def _extract_excel(self, content: bytes) -> str:
         """Extract text from Excel file."""
         try:
-            import pandas as pd
-            text = ""
+            # calamine (Rust) reads workbooks far faster than openpyxl and
+            # without materializing DataFrames
+            if CalamineWorkbook is not None:
+                wb = CalamineWorkbook.from_filelike(io.BytesIO(content))
+                parts = []
+                for sheet_name in wb.sheet_names:
+                    rows = wb.get_sheet_by_name(sheet_name).to_python()
+                    parts.append(f"\n--- Sheet: {sheet_name} ---")
+                    parts.extend("\t".join(str(cell) for cell in row) for row in rows)
+                text = "\n".join(parts)
+                return text.strip() if text.strip() else "[Excel file - no data found]"
+
+            parts = []
             excel_file = io.BytesIO(content)
             df_dict = pd.read_excel(excel_file, sheet_name=None, engine='openpyxl')
             for sheet_name, df in df_dict.items():
-                text += f"\n--- Sheet: {sheet_name} ---\n"
-                text += df.to_string(index=False) + "\n"
+                parts.append(f"\n--- Sheet: {sheet_name} ---")
+                parts.append(df.to_string(index=False))
+            text = "\n".join(parts)
             return text.strip() if text.strip() else "[Excel file - no data found]"
         except Exception as e:
             raise ValueError(f"Excel processing error: {str(e)}")
-    
+
     def _extract_csv(self, content: bytes) -> str:
         """Extract text from CSV file."""
         try:
-            import pandas as pd
-            # Try different encodings
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
+            # Arrow's multithreaded C++ reader; fall back to pandas for
+            # files it cannot parse (odd encodings, ragged rows)
+            if pa_csv is not None:
                 try:
-                    df = pd.read_csv(io.BytesIO(content), encoding=encoding)
-                    return df.to_string(index=False)
-                except UnicodeDecodeError:
-                    continue
+                    table = pa_csv.read_csv(io.BytesIO(content))
+                    columns = [col.to_pylist() for col in table.columns]
+                    parts = ["\t".join(table.column_names)]
+                    parts.extend("\t".join(str(v) for v in row) for row in zip(*columns))
+                    return "\n".join(parts)
+                except Exception:
+                    pass
+
+            if pd is not None:
+                # Try different encodings
+                for encoding in ['utf-8', 'latin-1', 'cp1252']:
+                    try:
+                        df = pd.read_csv(io.BytesIO(content), encoding=encoding)
+                        return df.to_string(index=False)
+                    except UnicodeDecodeError:
+                        continue
             # Fallback: just read as text
             return content.decode('latin-1', errors='ignore')
         except Exception as e:
@@ -258,40 +488,42 @@ class FileProcessor:
             text = content.decode("utf-8")
         except UnicodeDecodeError:
             text = content.decode("latin-1", errors='ignore')
-        
-        lang_names = {
-            "py": "Python", "java": "Java", "c": "C", "h": "C Header",
-            "cpp": "C++", "js": "JavaScript", "ts": "TypeScript",
-            "swift": "Swift", "r": "R", "rs": "Rust", "sql": "SQL",
-            "css": "CSS", "txt": "Text",
-            # New languages
-            "go": "Go", "kt": "Kotlin", "scala": "Scala",
-            "php": "PHP", "rb": "Ruby", "sh": "Shell", "bash": "Bash"
-        }
-        
-        lang = lang_names.get(extension, extension.upper())
+
+        lang = _LANG_NAMES.get(extension, extension.upper())
         return f"[{lang} Code]\n{text}"
     
     def _extract_html(self, content: bytes) -> str:
         """Extract text from HTML file."""
+        if lxml is not None:
+            try:
+                # lxml's C parser is several times faster than html.parser
+                tree = lxml.html.fromstring(content)
+                for element in tree.xpath('//script|//style'):
+                    element.getparent().remove(element)
+                return tree.text_content().strip()
+            except Exception:
+                pass
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            # Remove script and style elements
+            soup = BeautifulSoup(content, 'lxml')
             for element in soup(['script', 'style']):
                 element.decompose()
             return soup.get_text(separator='\n', strip=True)
-        except Exception as e:
+        except Exception:
             # Fallback to plain text
             return self._extract_text_plain(content)
-    
+
     def _extract_xml(self, content: bytes) -> str:
         """Extract text from XML file."""
+        if etree is not None:
+            try:
+                tree = etree.fromstring(content)
+                return "\n".join(t.strip() for t in tree.itertext() if t.strip())
+            except Exception:
+                pass
         try:
-            from bs4 import BeautifulSoup
             soup = BeautifulSoup(content, 'lxml-xml')
             return soup.get_text(separator='\n', strip=True)
-        except Exception as e:
+        except Exception:
             # Fallback to plain text
             return self._extract_text_plain(content)
     
@@ -313,15 +545,23 @@ class FileProcessor:
     
     def _extract_image_ocr(self, content: bytes) -> str:
         """Extract text from image using OCR."""
+        if cv2 is None:
+            return "[OCR not available - install opencv-python and pytesseract]"
         try:
-            import cv2
-            import pytesseract
-            import numpy as np
-            
             nparr = np.frombuffer(content, np.uint8)
             image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            text = pytesseract.image_to_string(gray)
+
+            # Fewer pixels means linearly less Tesseract work
+            h, w = gray.shape
+            if max(h, w) > 2000:
+                scale = 2000 / max(h, w)
+                gray = cv2.resize(gray, (int(w * scale), int(h * scale)),
+                                  interpolation=cv2.INTER_AREA)
+            gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY, 31, 11)
+
+            text = _ocr_image(gray)
             return f"[OCR Extracted Text]\n{text}" if text.strip() else "[Image - no text extracted]"
         except ImportError:
             return "[OCR not available - install opencv-python and pytesseract]"
@@ -329,93 +569,143 @@ class FileProcessor:
             return f"[Image processing error: {str(e)}]"
     
     def _extract_zip(self, content: bytes) -> str:
-        """Extract text from files inside ZIP archive."""
-        text = ""
+        """Extract text from files inside ZIP archive, processing entries in parallel."""
         try:
+            # Read all entry bytes first (fast), then extract concurrently -
+            # OCR/PDF/ASR work on different entries runs in parallel threads
+            entries = []
             with zipfile.ZipFile(io.BytesIO(content), 'r') as z:
                 for filename in z.namelist():
                     if filename.endswith('/'):
                         continue
                     ext = filename.split('.')[-1].lower()
+                    # Nested archives are skipped to bound recursion
                     if ext in self.SUPPORTED_EXTENSIONS and ext != 'zip':
                         try:
                             with z.open(filename) as f:
-                                file_content = f.read()
-                                extracted = self.extract_text(file_content, filename)
-                                text += f"\n--- {filename} ---\n{extracted}\n"
-                        except:
+                                entries.append((filename, f.read()))
+                        except Exception:
                             pass
+
+            def extract_entry(entry):
+                filename, data = entry
+                try:
+                    return f"\n--- {filename} ---\n{self.extract_text(data, filename)}\n"
+                except Exception:
+                    return ""
+
+            parts = []
+            if entries:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    parts = list(executor.map(extract_entry, entries))
+
+            text = "".join(parts)
             return text.strip() if text.strip() else "[ZIP file - no extractable content]"
         except Exception as e:
             raise ValueError(f"ZIP processing error: {str(e)}")
     
     def _extract_audio(self, content: bytes, extension: str) -> str:
         """Extract text from audio (WAV/MP3) using speech recognition."""
+        import tempfile
+        import os
+
+        with tempfile.NamedTemporaryFile(suffix=f'.{extension}', delete=False) as tmp:
+            tmp.write(content)
+            tmp_path = tmp.name
+        try:
+            return self._extract_audio_from_path(tmp_path, extension)
+        finally:
+            os.unlink(tmp_path)
+
+    def _extract_audio_from_path(self, path: str, extension: str) -> str:
+        """Transcribe an audio file that already lives on disk.
+
+        Prefers a local faster-whisper model (no network round-trip, handles
+        MP3 via ffmpeg directly); falls back to the online recognizer.
+        """
+        try:
+            model = _get_whisper_model()
+            segments, _ = model.transcribe(path, vad_filter=True)
+            text = " ".join(segment.text.strip() for segment in segments)
+            if text.strip():
+                return f"[Audio Transcription]\n{text}"
+            return "[Audio - no speech detected]"
+        except ImportError:
+            pass
+        except Exception as e:
+            return f"[Audio processing error: {str(e)}]"
+
+        return self._extract_audio_google(path, extension)
+
+    def _extract_audio_google(self, path: str, extension: str) -> str:
+        """Legacy transcription via the online Google recognizer."""
         try:
             import speech_recognition as sr
             import tempfile
             import os
-            
+
             # For MP3, we need to convert to WAV first
+            wav_path, converted = path, False
             if extension == "mp3":
                 try:
                     from pydub import AudioSegment
-                    audio = AudioSegment.from_mp3(io.BytesIO(content))
-                    wav_io = io.BytesIO()
-                    audio.export(wav_io, format="wav")
-                    content = wav_io.getvalue()
+                    audio = AudioSegment.from_mp3(path)
+                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
+                        wav_path = tmp.name
+                    audio.export(wav_path, format="wav")
+                    converted = True
                 except ImportError:
                     return "[MP3 processing requires pydub - install with: pip install pydub]"
-            
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
-            
+
             try:
                 r = sr.Recognizer()
-                with sr.AudioFile(tmp_path) as source:
+                with sr.AudioFile(wav_path) as source:
                     audio_data = r.record(source)
                     text = r.recognize_google(audio_data)
                 return f"[Audio Transcription]\n{text}"
             finally:
-                os.unlink(tmp_path)
+                if converted:
+                    os.unlink(wav_path)
         except ImportError:
             return "[Audio processing not available - install speech_recognition]"
         except Exception as e:
             return f"[Audio processing error: {str(e)}]"
-    
+
     def _extract_video(self, content: bytes) -> str:
         """Extract audio from video and transcribe."""
+        import tempfile
+        import os
+
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_video:
+            tmp_video.write(content)
+            tmp_video_path = tmp_video.name
+        try:
+            return self._extract_video_from_path(tmp_video_path)
+        finally:
+            os.unlink(tmp_video_path)
+
+    def _extract_video_from_path(self, path: str) -> str:
+        """Extract audio from a video file on disk and transcribe it."""
         try:
             from moviepy.editor import VideoFileClip
             import tempfile
             import os
-            
-            # Save video to temp file
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_video:
-                tmp_video.write(content)
-                tmp_video_path = tmp_video.name
-            
+
+            # Extract audio
+            video = VideoFileClip(path)
+
+            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_audio:
+                tmp_audio_path = tmp_audio.name
+
+            video.audio.write_audiofile(tmp_audio_path, verbose=False, logger=None)
+            video.close()
+
             try:
-                # Extract audio
-                video = VideoFileClip(tmp_video_path)
-                
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_audio:
-                    tmp_audio_path = tmp_audio.name
-                
-                video.audio.write_audiofile(tmp_audio_path, verbose=False, logger=None)
-                video.close()
-                
-                # Transcribe audio
-                with open(tmp_audio_path, 'rb') as f:
-                    audio_content = f.read()
-                
-                result = self._extract_audio(audio_content, 'wav')
-                os.unlink(tmp_audio_path)
-                
-                return f"[Video Transcription]\n{result.replace('[Audio Transcription]', '').strip()}"
+                result = self._extract_audio_from_path(tmp_audio_path, 'wav')
             finally:
-                os.unlink(tmp_video_path)
+                os.unlink(tmp_audio_path)
+
+            return f"[Video Transcription]\n{result.replace('[Audio Transcription]', '').strip()}"
         except ImportError:
             return "[Video processing requires moviepy - install with: pip install moviepy]"
         except Exception as e:
@@ -436,5 +726,32 @@ class FileProcessor:
         ]
 
 
+# Extension dispatch table - replaces the long elif chain; handlers for
+# extensions in _TAKES_EXTENSION receive the extension as a second argument
+FileProcessor._DISPATCH = {
+    "pdf": FileProcessor._extract_pdf,
+    "docx": FileProcessor._extract_docx,
+    "doc": FileProcessor._extract_doc_legacy,
+    "pptx": FileProcessor._extract_pptx,
+    "ppt": FileProcessor._extract_ppt_legacy,
+    "xlsx": FileProcessor._extract_excel,
+    "xls": FileProcessor._extract_excel,
+    "csv": FileProcessor._extract_csv,
+    "html": FileProcessor._extract_html,
+    "xml": FileProcessor._extract_xml,
+    "json": FileProcessor._extract_json,
+    "md": FileProcessor._extract_text_plain,
+    "tex": FileProcessor._extract_text_plain,
+    "jpg": FileProcessor._extract_image_ocr,
+    "jpeg": FileProcessor._extract_image_ocr,
+    "png": FileProcessor._extract_image_ocr,
+    "bmp": FileProcessor._extract_image_ocr,
+    "zip": FileProcessor._extract_zip,
+    "mp4": FileProcessor._extract_video,
+    **dict.fromkeys(_CODE_EXTENSIONS, FileProcessor._extract_code),
+    **dict.fromkeys(("wav", "mp3"), FileProcessor._extract_audio),
+}
+FileProcessor._TAKES_EXTENSION = _CODE_EXTENSIONS | {"wav", "mp3"}
+
 # Singleton instance
 file_processor = FileProcessor()
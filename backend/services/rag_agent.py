@@ -1,8 +1,9 @@
 """RAG Agent - Supports Gemini and Ollama."""
+import json
 import os
 import logging
 import google.generativeai as genai
-import requests
+import httpx
 from config import get_settings
 from services.vector_store import vector_store
 
@@ -24,85 +25,156 @@ Context:
 
 class RAGAgent:
     def __init__(self):
-        self.gemini_model = None
+        self._models: dict[str, genai.GenerativeModel] = {}
+        self._http: httpx.AsyncClient | None = None
         self.current_provider = "gemini"
-        self._initialized = False
-    
+
+    def _ensure_http(self) -> httpx.AsyncClient:
+        """Shared keep-alive client so TCP handshakes are amortized across calls."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=settings.ollama_base_url,
+                timeout=120,
+                limits=httpx.Limits(max_keepalive_connections=10),
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
     def initialize(self, provider: str = None):
+        """Idempotent per-provider setup; meant to run once at startup."""
         if provider:
             self.current_provider = provider
-        
-        if self.current_provider == "gemini":
+
+        if self.current_provider == "gemini" and "gemini" not in self._models:
             api_key = os.getenv("GOOGLE_API_KEY")
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY not found")
             genai.configure(api_key=api_key)
-            self.gemini_model = genai.GenerativeModel(settings.gemini_model)
-        
-        self._initialized = True
-    
-    def _call_gemini(self, prompt: str) -> str:
-        response = self.gemini_model.generate_content(prompt)
+            self._models["gemini"] = genai.GenerativeModel(settings.gemini_model)
+
+    async def _call_gemini(self, prompt: str) -> str:
+        response = await self._models["gemini"].generate_content_async(prompt)
         return response.text
     
-    def _call_ollama(self, prompt: str) -> str:
+    async def _call_ollama(self, prompt: str) -> str:
         """Call Ollama API for local LLM inference."""
         try:
-            response = requests.post(
-                f"{settings.ollama_base_url}/api/generate",
+            response = await self._ensure_http().post(
+                "/api/generate",
                 json={
                     "model": settings.ollama_model,
                     "prompt": prompt,
                     "stream": False
-                },
-                timeout=120
+                }
             )
             if response.status_code == 200:
                 return response.json().get("response", "No response from Ollama")
             else:
                 return f"Ollama error: {response.status_code}"
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             return "Ollama is not running. Start with: `ollama serve` then `ollama run llama3.2:3b`"
         except Exception as e:
             return f"Ollama error: {str(e)}"
     
-    def _retrieve_context(self, query: str, session_id: str) -> tuple[str, list]:
-        """Retrieve context from documents."""
-        results = vector_store.search(query, session_id, top_k=settings.top_k_results)
-        sources = []
-        
-        if results:
-            parts = [f"[{r['source']}]\n{r['text']}" for r in results]
+    async def _retrieve_context(self, query: str, session_id: str) -> tuple[str, list]:
+        """Retrieve context from documents, dropping duplicate chunks.
+
+        Overlapping chunks from the same passage would otherwise repeat in
+        the prompt; deduplicating keeps the LLM prompt (and latency) small.
+        """
+        results = await vector_store.search(query, session_id, top_k=settings.top_k_results)
+
+        seen = set()
+        unique = []
+        for r in results:
+            fingerprint = hash(r['text'][:200])
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                unique.append(r)
+
+        if unique:
+            parts = [f"[{r['source']}]\n{r['text']}" for r in unique]
             context = "\n\n---\n\n".join(parts)
-            sources = [r['source'] for r in results]
+            sources = list(dict.fromkeys(r['source'] for r in unique))
         else:
             context = "No relevant documents found in uploaded files."
-        
+            sources = []
+
         return context, sources
     
     async def chat(self, query: str, session_id: str, history: list = None, 
                    provider: str = None) -> dict:
         if provider:
             self.current_provider = provider
-        self.initialize(self.current_provider)
-        
+        if self.current_provider == "gemini" and "gemini" not in self._models:
+            self.initialize(self.current_provider)
+
         try:
-            context, sources = self._retrieve_context(query, session_id)
+            context, sources = await self._retrieve_context(query, session_id)
             prompt = f"{SYSTEM_PROMPT.format(context=context)}\n\nQuestion: {query}"
             
             if self.current_provider == "ollama":
-                answer = self._call_ollama(prompt)
+                answer = await self._call_ollama(prompt)
             else:
-                answer = self._call_gemini(prompt)
+                answer = await self._call_gemini(prompt)
             
             return {
                 "response": answer, 
-                "sources": list(set(sources)), 
+                "sources": sources,
                 "model": self.current_provider
             }
         except Exception as e:
             logger.error(f"Chat error: {e}")
             return {"response": f"Error: {str(e)}", "sources": [], "model": self.current_provider}
 
+    async def _stream_ollama(self, prompt: str):
+        """Yield response fragments from Ollama as they arrive."""
+        try:
+            async with self._ensure_http().stream(
+                "POST", "/api/generate",
+                json={"model": settings.ollama_model, "prompt": prompt, "stream": True}
+            ) as response:
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    piece = json.loads(line).get("response", "")
+                    if piece:
+                        yield piece
+        except httpx.ConnectError:
+            yield "Ollama is not running. Start with: `ollama serve` then `ollama run llama3.2:3b`"
+
+    async def chat_stream(self, query: str, session_id: str, history: list = None,
+                          provider: str = None):
+        """Stream the answer as it is generated instead of buffering it.
+
+        Yields one dict with sources/model first, then dicts with response
+        fragments as the model produces them.
+        """
+        if provider:
+            self.current_provider = provider
+        if self.current_provider == "gemini" and "gemini" not in self._models:
+            self.initialize(self.current_provider)
+
+        try:
+            context, sources = await self._retrieve_context(query, session_id)
+            prompt = f"{SYSTEM_PROMPT.format(context=context)}\n\nQuestion: {query}"
+            yield {"sources": sources, "model": self.current_provider}
+
+            if self.current_provider == "ollama":
+                async for piece in self._stream_ollama(prompt):
+                    yield {"response": piece}
+            else:
+                stream = await self._models["gemini"].generate_content_async(prompt, stream=True)
+                async for chunk in stream:
+                    if chunk.parts and chunk.text:
+                        yield {"response": chunk.text}
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield {"response": f"Error: {str(e)}"}
+
 
 rag_agent = RAGAgent()
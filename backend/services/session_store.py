@@ -0,0 +1,66 @@
+"""Session Store - bounded session state with a pluggable backend."""
+import logging
+from typing import Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBackend:
+    """Default backend: bounded TTL cache in process memory."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, session_id: str) -> Optional[dict]:
+        return self._cache.get(session_id)
+
+    def set(self, session_id: str, data: dict) -> None:
+        self._cache[session_id] = data
+
+    def delete(self, session_id: str) -> None:
+        self._cache.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._cache
+
+
+class SessionPool:
+    """Session state behind an injectable backend.
+
+    The default in-process cache bounds memory and expires idle sessions
+    instead of growing without limit; a Redis-backed implementation of the
+    same get/set/delete interface can be injected for multi-worker
+    deployments where state must live outside the process.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend or InMemoryBackend()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        return self._backend.get(session_id)
+
+    def set(self, session_id: str, data: dict) -> None:
+        self._backend.set(session_id, data)
+
+    def delete(self, session_id: str) -> None:
+        self._backend.delete(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._backend
+
+    def __getitem__(self, session_id: str) -> dict:
+        data = self._backend.get(session_id)
+        if data is None:
+            raise KeyError(session_id)
+        return data
+
+    def __setitem__(self, session_id: str, data: dict) -> None:
+        self._backend.set(session_id, data)
+
+    def __delitem__(self, session_id: str) -> None:
+        self._backend.delete(session_id)
+
+
+session_pool = SessionPool()
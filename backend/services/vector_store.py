@@ -1,23 +1,104 @@
 """Vector Store - FAISS with Google embeddings."""
+import anyio
+import anyio.to_thread
+import asyncio
 import faiss
+import hashlib
+import json
 import numpy as np
 import os
 import logging
+from pathlib import Path
 import google.generativeai as genai
+from cachetools import LRUCache
 from config import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+EMBED_MODEL = "models/gemini-embedding-001"
+
+# On-disk copy of each session's vectors and metadata; a restart reloads
+# from here instead of re-embedding through the paid API
+PERSIST_DIR = Path("/tmp/mars_vectors")
+
+# Index builds and graph inserts take seconds at 3072 dims, and FAISS
+# releases the GIL and parallelizes internally with OMP - run one such job
+# at a time in a worker thread so the event loop keeps serving requests
+_index_limiter = anyio.CapacityLimiter(1)
+
+
+def _fingerprint(text: str, task_type: str) -> bytes:
+    """Cache key for one embedding: model + task + content hash, so changing
+    the model or task type invalidates old entries."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(EMBED_MODEL.encode())
+    h.update(task_type.encode())
+    h.update(text.encode())
+    return h.digest()
+
+
+class _Session:
+    """Vectors, document fields and FAISS index for one session.
+
+    Document fields are stored as parallel arrays (struct-of-arrays) rather
+    than a list of per-document dicts: row i of the index corresponds to
+    texts[i] / sources[i] / chunk_idx[i].
+    """
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, dim: int):
+        # No FAISS index until the session outgrows the matvec search
+        # path; small sessions are answered straight from the buffer
+        self.index = None
+        # Normalized vectors, the source of truth for small-session search
+        # and for building the index later; grown geometrically so appends
+        # are amortized O(1) instead of a full copy per ingest
+        self._buf = np.empty((self._INITIAL_CAPACITY, dim), dtype=np.float32)
+        self._size = 0
+        self.texts: list[str] = []
+        self.sources: list[str] = []
+        self.chunk_idx = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the filled rows; contiguous, safe to hand to FAISS."""
+        return self._buf[:self._size]
+
+    def append_vectors(self, embeddings: np.ndarray):
+        needed = self._size + len(embeddings)
+        if needed > len(self._buf):
+            capacity = max(len(self._buf) * 2, needed)
+            grown = np.empty((capacity, self._buf.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._buf[:self._size]
+            self._buf = grown
+        self._buf[self._size:needed] = embeddings
+        self._size = needed
+
 
 class VectorStore:
     EMBEDDING_DIM = 3072  # gemini-embedding-001 outputs 3072 dimensions
-    
+    EMBED_BATCH_SIZE = 100  # provider cap on contents per embed request
+    EMBED_MAX_CHARS = 8000  # conservative bound for the model's token limit
+    HNSW_THRESHOLD = 2000  # above this, exhaustive flat search dominates latency
+
     def __init__(self):
-        self.index = None
-        self.documents = []
+        # One index per session: searches never touch other sessions'
+        # vectors and deleting a session is just dropping its entry
+        self._sessions: dict[str, _Session] = {}
+        self._load_lock = asyncio.Lock()
         self._initialized = False
-    
+        # Embeddings already paid for, as fp32 arrays (~12 KB each at 3072
+        # dims vs ~100 KB as the API's list of Python floats) and bounded so
+        # neither cache can grow past ~120 MB. Documents are keyed by content
+        # fingerprint; query embeddings repeat heavily (retries, re-asks)
+        self._emb_cache: LRUCache = LRUCache(maxsize=10000)
+        self._query_cache: LRUCache = LRUCache(maxsize=10000)
+
     def initialize(self):
         if self._initialized:
             return
@@ -25,67 +106,241 @@ class VectorStore:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found")
         genai.configure(api_key=api_key)
-        self.index = faiss.IndexFlatIP(self.EMBEDDING_DIM)
+        # Default OMP settings spawn one thread per core, which thrashes the
+        # cache on high-core boxes for little gain on per-query search
+        faiss.omp_set_num_threads(min(8, os.cpu_count() or 1))
+        try:
+            # Confirm the AVX wheel variant actually loaded; distance kernels
+            # are several times slower on the baseline SSE build
+            logger.info(f"FAISS instruction sets: {faiss.supported_instruction_sets()}")
+        except AttributeError:
+            pass
         self._initialized = True
     
-    def _get_embeddings(self, texts: list[str]) -> list[list[float]]:
-        return [genai.embed_content(model="models/gemini-embedding-001", content=t, task_type="retrieval_document")['embedding'] for t in texts]
-    
-    def _get_query_embedding(self, query: str) -> list[float]:
-        return genai.embed_content(model="models/gemini-embedding-001", content=query, task_type="retrieval_query")['embedding']
-    
-    def add_documents(self, chunks: list[dict], session_id: str) -> int:
+    async def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        result = await genai.embed_content_async(
+            model=EMBED_MODEL,
+            content=batch,
+            task_type="retrieval_document",
+        )
+        return result['embedding']
+
+    async def _get_embeddings_uncached(self, texts: list[str]) -> list[list[float]]:
+        # One round-trip per batch of texts instead of one per text; batches
+        # beyond the per-request cap run concurrently, in input order
+        if not texts:
+            return []
+        batches = [texts[start:start + self.EMBED_BATCH_SIZE]
+                   for start in range(0, len(texts), self.EMBED_BATCH_SIZE)]
+        if len(batches) == 1:
+            return await self._embed_batch(batches[0])
+
+        embeddings = []
+        for batch_result in await asyncio.gather(*(self._embed_batch(b) for b in batches)):
+            embeddings.extend(batch_result)
+        return embeddings
+
+    def _truncate(self, texts: list[str]) -> list[str]:
+        # One over-limit text fails the whole batch, so cap length up front
+        # rather than pay a retry; chunking keeps most texts far below this
+        long = sum(len(t) > self.EMBED_MAX_CHARS for t in texts)
+        if long:
+            logger.info(f"Truncating {long} text(s) to {self.EMBED_MAX_CHARS} chars for embedding")
+            texts = [t[:self.EMBED_MAX_CHARS] for t in texts]
+        return texts
+
+    async def _get_embeddings(self, texts: list[str]) -> list[np.ndarray]:
+        # Look up each text in the cache, batch-embed only the misses, then
+        # reassemble in input order - repeated content costs nothing
+        texts = self._truncate(texts)
+        keys = [_fingerprint(t, "retrieval_document") for t in texts]
+        # Keep only the first occurrence of each missing text: duplicated
+        # chunks (boilerplate, repeated files) are embedded once and the
+        # final cache read broadcasts the result to every occurrence
+        seen = set()
+        misses = [i for i, key in enumerate(keys)
+                  if key not in self._emb_cache and not (key in seen or seen.add(key))]
+        if misses:
+            fresh = await self._get_embeddings_uncached([texts[i] for i in misses])
+            for i, embedding in zip(misses, fresh):
+                self._emb_cache[keys[i]] = np.asarray(embedding, dtype=np.float32)
+        return [self._emb_cache[key] for key in keys]
+
+    async def _get_query_embedding(self, query: str) -> np.ndarray:
+        query = query[:self.EMBED_MAX_CHARS]
+        embedding = self._query_cache.get(query)
+        if embedding is None:
+            result = await genai.embed_content_async(
+                model=EMBED_MODEL, content=query, task_type="retrieval_query")
+            embedding = self._query_cache[query] = np.asarray(result['embedding'],
+                                                              dtype=np.float32)
+        return embedding
+
+    def _assemble_normalized(self, embeddings: list) -> np.ndarray:
+        # Fill a preallocated fp32 matrix straight from the cached rows and
+        # normalize in place while the rows are still cache-resident - one
+        # pass over memory instead of np.array copy + separate normalize
+        out = np.empty((len(embeddings), self.EMBEDDING_DIM), dtype=np.float32)
+        for i, embedding in enumerate(embeddings):
+            out[i] = embedding
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    async def add_documents(self, chunks: list[dict], session_id: str) -> int:
         self.initialize()
         if not chunks:
             return 0
-        
+
         texts = [c["text"] for c in chunks]
-        embeddings = np.array(self._get_embeddings(texts), dtype=np.float32)
-        faiss.normalize_L2(embeddings)
-        
-        start_idx = len(self.documents)
-        self.index.add(embeddings)
-        
-        for i, chunk in enumerate(chunks):
-            self.documents.append({
-                "text": chunk["text"], "source": chunk["source"],
-                "chunk_index": chunk["chunk_index"], "session_id": session_id,
-                "faiss_idx": start_idx + i
-            })
+        embeddings = self._assemble_normalized(await self._get_embeddings(texts))
+
+        session = await self._get_session(session_id)
+        if session is None:
+            session = self._sessions.setdefault(session_id, _Session(self.EMBEDDING_DIM))
+        session.append_vectors(embeddings)
+        session.texts.extend(texts)
+        session.sources.extend(c["source"] for c in chunks)
+        session.chunk_idx = np.concatenate([
+            session.chunk_idx,
+            np.array([c["chunk_index"] for c in chunks], dtype=np.int32)
+        ])
+        if session.index is not None:
+            # Graph inserts cost milliseconds per vector - keep them off
+            # the event loop
+            await anyio.to_thread.run_sync(session.index.add, embeddings,
+                                           limiter=_index_limiter)
+        elif len(session) > self.HNSW_THRESHOLD:
+            session.index = await anyio.to_thread.run_sync(
+                self._build_index, session.vectors, limiter=_index_limiter)
+        self._persist(session_id, embeddings, chunks)
         return len(chunks)
-    
-    def search(self, query: str, session_id: str, top_k: int = None) -> list[dict]:
+
+    def _session_paths(self, session_id: str) -> tuple[Path, Path]:
+        stem = hashlib.blake2b(session_id.encode(), digest_size=16).hexdigest()
+        return PERSIST_DIR / f"{stem}.vec", PERSIST_DIR / f"{stem}.jsonl"
+
+    def _persist(self, session_id: str, embeddings: np.ndarray, chunks: list[dict]):
+        # Append-only: raw fp16 rows plus a JSONL metadata sidecar. The
+        # vectors are unit-norm so fp16 is lossless enough for retrieval
+        # and halves disk and reload I/O. Failure to persist is logged but
+        # never fails the ingest
+        try:
+            vec_path, meta_path = self._session_paths(session_id)
+            PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+            with vec_path.open("ab") as f:
+                f.write(embeddings.astype(np.float16).tobytes())
+            with meta_path.open("a", encoding="utf-8") as f:
+                for c in chunks:
+                    f.write(json.dumps({"text": c["text"], "source": c["source"],
+                                        "chunk_index": c["chunk_index"]}) + "\n")
+        except OSError as e:
+            logger.warning(f"Vector persistence failed for {session_id}: {e}")
+
+    async def _get_session(self, session_id: str) -> "_Session | None":
+        """In-memory session, falling back to a lazy reload from disk."""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            return session
+        # The reload (file read + index rebuild) can take tens of seconds
+        # for a big session: run it in a worker thread, and serialize loads
+        # so concurrent requests don't rebuild the same session twice
+        async with self._load_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = await anyio.to_thread.run_sync(
+                    self._load_session, session_id, limiter=_index_limiter)
+            return session
+
+    def _load_session(self, session_id: str) -> "_Session | None":
+        vec_path, meta_path = self._session_paths(session_id)
+        if not (vec_path.exists() and meta_path.exists()):
+            return None
+        try:
+            # Widen back to fp32: NumPy's fp16 matmul is software-emulated,
+            # so the in-memory search buffer stays fp32
+            vectors = (np.fromfile(vec_path, dtype=np.float16)
+                       .reshape(-1, self.EMBEDDING_DIM).astype(np.float32))
+            session = _Session(self.EMBEDDING_DIM)
+            chunk_indices = []
+            with meta_path.open(encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    session.texts.append(entry["text"])
+                    session.sources.append(entry["source"])
+                    chunk_indices.append(entry["chunk_index"])
+            if len(session.texts) != len(vectors):
+                raise ValueError("vector/metadata length mismatch")
+            session.chunk_idx = np.array(chunk_indices, dtype=np.int32)
+            session.append_vectors(vectors)
+            if len(session) > self.HNSW_THRESHOLD:
+                session.index = self._build_index(session.vectors)
+        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not reload session {session_id} from disk: {e}")
+            return None
+        logger.info(f"Reloaded {len(session)} vectors for session {session_id} from disk")
+        self._sessions[session_id] = session
+        return session
+
+    def _build_index(self, vectors: np.ndarray):
+        """Build an HNSW index over int8 storage for a large session.
+
+        Vectors are L2-normalized, so inner product is cosine similarity,
+        HNSW recall stays ~99%, and 8-bit scalar quantization is nearly
+        lossless while storing 4x more vectors per cache line. Small
+        sessions never pay for an index at all - exact matvec search over
+        the buffer beats FAISS at that scale.
+
+        Building takes seconds; callers on the event loop must run this
+        via a worker thread.
+        """
+        index = faiss.IndexHNSWSQ(self.EMBEDDING_DIM, faiss.ScalarQuantizer.QT_8bit,
+                                  32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        index.train(vectors)
+        index.add(vectors)
+        return index
+
+    async def search(self, query: str, session_id: str, top_k: int = None) -> list[dict]:
         self.initialize()
         if top_k is None:
             top_k = settings.top_k_results
-        if not self.documents:
+        session = await self._get_session(session_id)
+        if session is None or not len(session):
             return []
-        
-        query_emb = np.array([self._get_query_embedding(query)], dtype=np.float32)
-        faiss.normalize_L2(query_emb)
-        
-        scores, indices = self.index.search(query_emb, min(len(self.documents), top_k * 5))
-        
+
+        query_emb = self._assemble_normalized([await self._get_query_embedding(query)])
+        k = min(len(session), top_k)
+
+        if session.index is not None:
+            session.index.hnsw.efSearch = max(64, top_k * 4)
+            # The index holds only this session's vectors, so no over-fetch
+            # or post-filtering is needed
+            scores, indices = session.index.search(query_emb, k)
+            # Mask out FAISS's -1 padding in one vectorized compare
+            hit_indices = indices[0]
+            valid = hit_indices >= 0
+            scores, hit_indices = scores[0][valid], hit_indices[valid]
+        else:
+            # Below the HNSW threshold a single BLAS matvec plus a partial
+            # sort is faster than FAISS's heap search with its SWIG and
+            # thread-dispatch overhead
+            scores = session.vectors @ query_emb[0]
+            hit_indices = np.argpartition(-scores, k - 1)[:k] if k < scores.size \
+                else np.arange(scores.size)
+            hit_indices = hit_indices[np.argsort(-scores[hit_indices])]
+            scores = scores[hit_indices]
+
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < 0 or idx >= len(self.documents):
-                continue
-            doc = self.documents[idx]
-            if doc["session_id"] == session_id:
-                results.append({"text": doc["text"], "source": doc["source"], "chunk_index": doc["chunk_index"], "score": float(score)})
-                if len(results) >= top_k:
-                    break
+        for score, idx in zip(scores, hit_indices):
+            results.append({"text": session.texts[idx], "source": session.sources[idx],
+                            "chunk_index": int(session.chunk_idx[idx]), "score": float(score)})
         return results
-    
+
     def clear_session(self, session_id: str) -> bool:
-        self.documents = [d for d in self.documents if d["session_id"] != session_id]
-        if self.documents and self._initialized:
-            embeddings = np.array(self._get_embeddings([d["text"] for d in self.documents]), dtype=np.float32)
-            faiss.normalize_L2(embeddings)
-            self.index = faiss.IndexFlatIP(self.EMBEDDING_DIM)
-            self.index.add(embeddings)
-        elif self._initialized:
-            self.index = faiss.IndexFlatIP(self.EMBEDDING_DIM)
+        self._sessions.pop(session_id, None)
+        for path in self._session_paths(session_id):
+            path.unlink(missing_ok=True)
         return True
 
 
@@ -30,6 +30,15 @@ function App() {
     setMessages(prev => [...prev, message])
   }
 
+  // Merge a patch into the last message; used to append streamed tokens
+  const handleUpdateLastMessage = (patch) => {
+    setMessages(prev => prev.map((message, i) =>
+      i === prev.length - 1
+        ? { ...message, ...(typeof patch === 'function' ? patch(message) : patch) }
+        : message
+    ))
+  }
+
   return (
     <div className="app">
       <Sidebar
@@ -46,6 +55,7 @@ function App() {
         sessionId={sessionId}
         messages={messages}
         onNewMessage={handleNewMessage}
+        onUpdateLastMessage={handleUpdateLastMessage}
         uploadedFiles={uploadedFiles}
       />
     </div>
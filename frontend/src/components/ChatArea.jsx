@@ -5,7 +5,7 @@ import axios from 'axios'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
-function ChatArea({ sessionId, messages, onNewMessage, uploadedFiles }) {
+function ChatArea({ sessionId, messages, onNewMessage, onUpdateLastMessage, uploadedFiles }) {
     const [input, setInput] = useState('')
     const [isLoading, setIsLoading] = useState(false)
     const [selectedModel, setSelectedModel] = useState('gemini')
@@ -20,6 +20,58 @@ function ChatArea({ sessionId, messages, onNewMessage, uploadedFiles }) {
         scrollToBottom()
     }, [messages])
 
+    // POST-initiated SSE stream (EventSource only supports GET). Throws if
+    // nothing was delivered so the caller can fall back to the buffered
+    // /chat endpoint; a mid-answer drop keeps whatever already arrived.
+    const streamChat = async (userMessage) => {
+        const response = await fetch(`${API_URL}/chat/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                message: userMessage,
+                session_id: sessionId || 'default',
+                model: selectedModel
+            })
+        })
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP ${response.status}`)
+        }
+
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        let started = false
+
+        try {
+            while (true) {
+                const { done, value } = await reader.read()
+                if (done) break
+                buffer += decoder.decode(value, { stream: true })
+                const events = buffer.split('\n\n')
+                buffer = events.pop()
+                for (const raw of events) {
+                    if (!raw.startsWith('data: ')) continue
+                    const data = raw.slice(6)
+                    if (data === '[DONE]') return
+                    const event = JSON.parse(data)
+                    if (!started) {
+                        started = true
+                        onNewMessage({
+                            role: 'assistant',
+                            content: event.response || '',
+                            sources: event.sources || [],
+                            model: event.model || selectedModel
+                        })
+                    } else if (event.response) {
+                        onUpdateLastMessage(message => ({ content: message.content + event.response }))
+                    }
+                }
+            }
+        } catch (err) {
+            if (!started) throw err
+        }
+    }
+
     const handleSubmit = async (e) => {
         e.preventDefault()
         if (!input.trim() || isLoading) return
@@ -34,24 +86,28 @@ function ChatArea({ sessionId, messages, onNewMessage, uploadedFiles }) {
         })
 
         try {
-            const response = await axios.post(`${API_URL}/chat`, {
-                message: userMessage,
-                session_id: sessionId || 'default',
-                model: selectedModel
-            })
-
-            onNewMessage({
-                role: 'assistant',
-                content: response.data.response,
-                sources: response.data.sources,
-                model: response.data.model
-            })
-        } catch (err) {
-            onNewMessage({
-                role: 'assistant',
-                content: `Error: ${err.response?.data?.detail || 'Failed to get response.'}`,
-                isError: true
-            })
+            await streamChat(userMessage)
+        } catch {
+            try {
+                const response = await axios.post(`${API_URL}/chat`, {
+                    message: userMessage,
+                    session_id: sessionId || 'default',
+                    model: selectedModel
+                })
+
+                onNewMessage({
+                    role: 'assistant',
+                    content: response.data.response,
+                    sources: response.data.sources,
+                    model: response.data.model
+                })
+            } catch (err) {
+                onNewMessage({
+                    role: 'assistant',
+                    content: `Error: ${err.response?.data?.detail || 'Failed to get response.'}`,
+                    isError: true
+                })
+            }
         } finally {
             setIsLoading(false)
         }
@@ -153,7 +209,7 @@ function ChatArea({ sessionId, messages, onNewMessage, uploadedFiles }) {
                     ))
                 )}
 
-                {isLoading && (
+                {isLoading && messages[messages.length - 1]?.role !== 'assistant' && (
                     <div className="message assistant">
                         <div className="message-content" style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
                             <Loader2 size={16} className="processing-spinner" />